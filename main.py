@@ -1,8 +1,12 @@
 import asyncio
-import json
 import time
 import random
-from pydantic import BaseModel, ConfigDict, Field
+import re
+from collections import OrderedDict
+from collections.abc import Mapping
+from dataclasses import dataclass, field
+import orjson
+from cachetools import TTLCache
 from astrbot.api.event import filter
 from astrbot.api.star import Context, Star, register
 from astrbot.core.message.components import At
@@ -21,50 +25,195 @@ from .similarity import Similarity
 # ==================== 常量定义 ====================
 
 # AstrBot 内置指令列表
-BUILT_CMDS = [
+BUILT_CMDS: frozenset[str] = frozenset({
     "llm", "t2i", "tts", "sid", "op", "wl",
     "dashboard_update", "alter_cmd", "provider", "model",
     "plugin", "plugin ls", "new", "switch", "rename",
     "del", "reset", "history", "persona", "tool ls",
     "key", "websearch", "help",
-]
+})
 
 # 合并延迟期间最多合并的消息数量（防止轰炸攻击）
 MAX_MERGE_MESSAGES = 10
 
+# 历史消息解析结果的缓存条数（按会话）
+HISTORY_CACHE_SIZE = 256
+
+# 状态缓存上限与过期时间（秒），超过时长未活跃的群组/成员会被淘汰
+GROUP_CACHE_SIZE = 2048
+GROUP_TTL = 7 * 86400
+MEMBER_CACHE_SIZE = 4096
+MEMBER_TTL = 86400
+# 后台清扫过期状态的间隔（秒）
+STATE_GC_INTERVAL = 3600
+
+
+def _alternation(words: list[str] | None) -> str | None:
+    """将关键词列表转为正则分支(长词优先)，无有效关键词时返回 None"""
+    words = sorted({w for w in words or () if w}, key=len, reverse=True)
+    return "|".join(map(re.escape, words)) if words else None
+
+
+def _compile_keywords(
+    forbidden: list[str] | None, mentions: list[str] | None
+) -> re.Pattern | None:
+    """
+    将违禁词与提及昵称编译为单个正则，一次扫描即可同时匹配两类关键词
+
+    使用零宽先行断言逐位置匹配，关键词之间可以重叠；
+    同一位置上违禁词优先，长词优先(被违禁词遮住的昵称由 ConfSnapshot.mention_re 补查)
+    """
+    parts = []
+    for name, words in (("forbid", forbidden), ("mention", mentions)):
+        if alt := _alternation(words):
+            parts.append(f"(?P<{name}>{alt})")
+    if not parts:
+        return None
+    return re.compile(f"(?=(?:{'|'.join(parts)}))")
+
+
+def _compile_mentions(mentions: list[str] | None) -> re.Pattern | None:
+    """单独编译提及昵称，用于补查与违禁词起始位置相同的昵称"""
+    alt = _alternation(mentions)
+    return re.compile(alt) if alt else None
+
 
 # ==================== 数据模型 ====================
 
-class MemberState(BaseModel):
-    """群成员状态"""
+@dataclass(slots=True, frozen=True)
+class ConfSnapshot:
+    """配置快照 - 热路径只读此对象，避免每条消息反复查询配置字典"""
+    group_whitelist: frozenset[str]                       # 群聊白名单
+    group_blacklist: frozenset[str]                       # 群聊黑名单
+    user_blacklist: frozenset[str]                        # 用户黑名单
+    block_builtin: bool                                   # 是否屏蔽内置指令
+    keyword_re: re.Pattern | None                         # 唤醒屏蔽词 + 提及唤醒的昵称(已编译)
+    mention_re: re.Pattern | None                         # 仅提及唤醒的昵称(已编译)
+    wake_extend: float                                    # 唤醒延长(秒)
+    min_wake_len: int                                     # 参与语义/相关性检测的最短消息长度
+    relevant_wake: float                                  # 相关性唤醒阈值
+    ask_wake: float                                       # 答疑唤醒阈值
+    bored_wake: float                                     # 无聊唤醒阈值
+    prob_wake: float                                      # 兜底唤醒概率
+    shutup: float                                         # 闭嘴检测阈值
+    insult: float                                         # 辱骂检测阈值
+    ai: float                                             # 人机检测阈值
+    silence_multiple: float                               # 沉默时间倍数
+    request_cd: float                                     # 请求CD(秒)
+    merge_delay: float                                    # 合并延迟(秒)
+
+    @classmethod
+    def from_config(cls, conf: AstrBotConfig) -> "ConfSnapshot":
+        """从插件配置生成快照"""
+        return cls(
+            group_whitelist=frozenset(conf["group_whitelist"] or ()),
+            group_blacklist=frozenset(conf["group_blacklist"] or ()),
+            user_blacklist=frozenset(conf.get("user_blacklist") or ()),
+            block_builtin=bool(conf["block_builtin"]),
+            keyword_re=_compile_keywords(
+                conf["wake_forbidden_words"], conf["mention_wake"]
+            ),
+            mention_re=_compile_mentions(conf["mention_wake"]),
+            wake_extend=float(conf["wake_extend"] or 0),
+            min_wake_len=int(conf.get("min_wake_len", 2) or 0),
+            relevant_wake=float(conf["relevant_wake"] or 0),
+            ask_wake=float(conf["ask_wake"] or 0),
+            bored_wake=float(conf["bored_wake"] or 0),
+            prob_wake=float(conf["prob_wake"] or 0),
+            shutup=float(conf["shutup"] or 0),
+            insult=float(conf["insult"] or 0),
+            ai=float(conf["ai"] or 0),
+            silence_multiple=float(conf["silence_multiple"] or 0),
+            request_cd=float(conf.get("request_cd") or 0),
+            merge_delay=float(conf["merge_delay"] or 0),
+        )
+
+    def scan_keywords(self, msg: str) -> tuple[str | None, str | None]:
+        """扫描一次消息，返回首个命中的(违禁词, 提及昵称)"""
+        forbidden = mention = None
+        if self.keyword_re:
+            for m in self.keyword_re.finditer(msg):
+                if m.lastgroup == "forbid":
+                    forbidden = forbidden or m.group("forbid")
+                else:
+                    mention = mention or m.group("mention")
+                if forbidden and mention:
+                    break
+        # 同一位置只会命中一个分支(违禁词优先)，昵称可能被违禁词遮住，
+        # 命中违禁词时补查一次昵称(管理员不受违禁词限制，仍需能被提及唤醒)
+        if forbidden and not mention and self.mention_re:
+            if hit := self.mention_re.search(msg):
+                mention = hit.group()
+        return forbidden, mention
+
+
+@dataclass(slots=True)
+class MemberState:
+    """群成员状态(时间字段均取自 time.monotonic()，只用于计算时间差)"""
     uid: str                                              # 用户ID
-    silence_until: float = 0.0                            # 沉默截止时间（时间戳）
-    last_request: float = 0.0                             # 最后一次发送LLM请求的时间（时间戳）
-    last_response: float = 0.0                            # 最后一次LLM响应的时间（时间戳）
-    lock: asyncio.Lock = Field(default_factory=asyncio.Lock)  # 异步锁
+    silence_until: float = 0.0                            # 沉默截止时间（monotonic 时钟）
+    last_request: float = float("-inf")                   # 最后一次发送LLM请求的时间（monotonic 时钟，-inf 表示从未请求）
+    last_response: float = float("-inf")                  # 最后一次LLM响应的时间（monotonic 时钟，-inf 表示从未响应）
     in_merging: bool = False                              # 是否正在消息合并状态中
-    
-    model_config = ConfigDict(arbitrary_types_allowed=True)
 
 
-class GroupState(BaseModel):
-    """群组状态"""
+@dataclass(slots=True)
+class GroupState:
+    """群组状态(时间字段均取自 time.monotonic()，只用于计算时间差)"""
     gid: str                                              # 群组ID
-    members: dict[str, MemberState] = Field(default_factory=dict)  # 成员状态字典
-    shutup_until: float = 0.0                             # 群组闭嘴截止时间（时间戳）
+    members: TTLCache = field(                            # 成员状态缓存(长期不活跃的成员自动淘汰)
+        default_factory=lambda: TTLCache(maxsize=MEMBER_CACHE_SIZE, ttl=MEMBER_TTL)
+    )
+    shutup_until: float = 0.0                             # 群组闭嘴截止时间（monotonic 时钟）
+
+    def get_member(self, uid: str) -> MemberState:
+        """获取或创建成员状态(每次访问都会刷新过期时间)"""
+        member = self.members.get(uid)
+        if member is None:
+            member = MemberState(uid=uid)
+        self.members[uid] = member
+        return member
+
+
+class _GroupCache(TTLCache):
+    """群组状态缓存: 群组被淘汰(过期或超出容量)时同步清理其话题数据"""
+
+    def popitem(self):
+        gid, g = super().popitem()
+        Similarity.clear_group(gid)
+        return gid, g
+
+    def expire(self, time=None):
+        # cachetools < 5 的 expire() 返回 None
+        expired = super().expire(time) or ()
+        for gid, _ in expired:
+            Similarity.clear_group(gid)
+        return expired
 
 
 class StateManager:
-    """状态管理器 - 管理所有群组和成员的状态"""
-    
-    _groups: dict[str, GroupState] = {}
-    
-    @classmethod
-    def get_group(cls, gid: str) -> GroupState:
-        """获取或创建群组状态"""
-        if gid not in cls._groups:
-            cls._groups[gid] = GroupState(gid=gid)
-        return cls._groups[gid]
+    """状态管理器 - 管理所有群组和成员的状态(每个插件实例一份)"""
+
+    def __init__(self) -> None:
+        self._groups: TTLCache = _GroupCache(maxsize=GROUP_CACHE_SIZE, ttl=GROUP_TTL)
+
+    def get_group(self, gid: str) -> GroupState:
+        """获取或创建群组状态(每次访问都会刷新过期时间)"""
+        g = self._groups.get(gid)
+        if g is None:
+            g = GroupState(gid=gid)
+        self._groups[gid] = g
+        return g
+
+    def gc(self) -> None:
+        """
+        清理过期状态
+
+        TTLCache 只在读写时顺带淘汰，长期无人说话的群不会被访问到，需定期主动清扫
+        """
+        self._groups.expire()
+        for g in list(self._groups.values()):
+            g.members.expire()
 
 
 @register(
@@ -89,16 +238,40 @@ class WakeProPlugin(Star):
         super().__init__(context)
         self.conf = config
         self.sent = Sentiment()
+        # (会话ID, 角色) -> ((历史长度, 历史哈希), 消息列表)
+        self._history_cache: OrderedDict[
+            tuple[str, str], tuple[tuple[int, int], list[str]]
+        ] = OrderedDict()
+        self.state = StateManager()
+        self._gc_task = asyncio.create_task(self._gc_loop())
+        self.reload()
+
+    def reload(self) -> None:
+        """重新生成配置快照(配置变更后调用)"""
+        self._cfg = ConfSnapshot.from_config(self.conf)
+
+    async def _gc_loop(self) -> None:
+        """后台定期清扫过期的群组/成员状态"""
+        while True:
+            await asyncio.sleep(STATE_GC_INTERVAL)
+            try:
+                self.state.gc()
+            except Exception as e:
+                logger.error(f"清理过期状态失败: {e}")
+
+    async def terminate(self) -> None:
+        """插件卸载时停止后台清扫任务"""
+        self._gc_task.cancel()
 
     # ==================== 消息级别: 仅基础检查 ====================
     
     @filter.event_message_type(filter.EventMessageType.GROUP_MESSAGE, priority=1)
-    async def on_group_msg(self, event: AstrMessageEvent):
+    async def on_group_msg(self, event: AstrMessageEvent) -> None:
         """
         【第一层: 消息级别 - 基础检查和唤醒判断】
 
         处理流程:
-        1. 全局屏蔽检查(黑白名单、权限)
+        1. 全局屏蔽检查(黑白名单、违禁词、权限)
         2. 内置指令屏蔽
         3. 检查是否已被其他插件处理
         4. 唤醒条件判断(决定是否调用LLM)
@@ -109,12 +282,14 @@ class WakeProPlugin(Star):
         gid: str = event.get_group_id()
         uid: str = event.get_sender_id()
         msg: str = event.message_str
-        g: GroupState = StateManager.get_group(gid)
+        g: GroupState = self.state.get_group(gid)
+        cfg: ConfSnapshot = self._cfg
 
         # 只处理文本消息
         if not msg:
             return
-        cmd = msg.split(" ", 1)[0]
+        cmd: str = msg.partition(" ")[0]
+        is_admin: bool = event.is_admin()
 
         # ========== 1. 全局屏蔽检查(快速失败) ==========
         
@@ -123,93 +298,53 @@ class WakeProPlugin(Star):
             return
         
         # 群聊白名单检查
-        if self.conf["group_whitelist"] and gid not in self.conf["group_whitelist"]:
+        if cfg.group_whitelist and gid not in cfg.group_whitelist:
             return
         
         # 群聊黑名单检查
-        if gid in self.conf["group_blacklist"] and not event.is_admin():
+        if gid in cfg.group_blacklist and not is_admin:
             event.stop_event()
             return
         
         # 用户黑名单检查
-        if uid in self.conf.get("user_blacklist", []):
+        if uid in cfg.user_blacklist:
+            event.stop_event()
+            return
+
+        # 违禁词与提及昵称一次扫描同时匹配
+        forbidden, mention = cfg.scan_keywords(msg)
+
+        # 违禁词检查(先于唤醒判断，含违禁词的消息不再进行任何检测)
+        if forbidden and not is_admin:
+            logger.debug(f"用户({uid})消息含违禁词：{forbidden}")
             event.stop_event()
             return
 
         # ========== 2. 内置指令屏蔽 ==========
         
-        if self.conf["block_builtin"]:
-            if not event.is_admin() and event.message_str in BUILT_CMDS:
+        # 按整条消息匹配(含"tool ls"这类多词指令)；
+        # 仅在消息确为指令调用(@或唤醒词)时才按首词匹配带参数的指令(如"llm off")，
+        # 避免误伤"help me please"这类以指令词开头的普通聊天
+        if cfg.block_builtin:
+            if not is_admin and (
+                msg in BUILT_CMDS
+                or (event.is_at_or_wake_command and cmd in BUILT_CMDS)
+            ):
                 logger.debug(f"用户({uid})触发内置指令，已屏蔽")
                 event.stop_event()
                 return
         
         # ========== 3. 唤醒条件判断(决定是否标记为LLM请求) ==========
         
-        # 初始化或获取用户状态
-        if uid not in g.members:
-            g.members[uid] = MemberState(uid=uid)
-        member = g.members[uid]
-        now = time.time()
-
-        # --- 唤醒条件判断 ---
-        
-        wake = event.is_at_or_wake_command  # 是否唤醒
-        reason = "at_or_cmd"                 # 唤醒原因
-
-        # 1. 提及唤醒：消息中包含特定关键词
-        if not wake and self.conf["mention_wake"]:
-            names = [n for n in self.conf["mention_wake"] if n]
-            for n in names:
-                if n and n in msg:
-                    wake = True
-                    reason = f"提及唤醒({n})"
-                    break
-
-        # 2. 唤醒延长：在上次LLM响应后的延长窗口内
-        if (
-            not wake
-            and self.conf["wake_extend"]
-            and (now - member.last_response) <= int(self.conf["wake_extend"] or 0)
-        ):
-            wake = True
-            reason = "唤醒延长"
-
-        # 3. 话题相关性唤醒：与最近对话内容相关
-        if not wake and self.conf["relevant_wake"]:
-            if bmsgs := await self._get_history_msg(event, count=5):
-                for bmsg in bmsgs:
-                    simi = Similarity.cosine(msg, bmsg, gid)
-                    if simi > self.conf["relevant_wake"]:
-                        wake = True
-                        reason = f"话题相关性{simi:.2f}>{self.conf['relevant_wake']}"
-                        break
-
-        # 4. 答疑唤醒：检测到提问意图
-        if not wake and self.conf["ask_wake"]:
-            if self.sent.ask(msg) > self.conf["ask_wake"]:
-                wake = True
-                reason = "答疑唤醒"
-
-        # 5. 无聊唤醒：检测到无聊/寻求陪伴的意图
-        if not wake and self.conf["bored_wake"]:
-            if self.sent.bored(msg) > self.conf["bored_wake"]:
-                wake = True
-                reason = "无聊唤醒"
-
-        # 6. 概率唤醒：随机唤醒
-        if not wake and self.conf["prob_wake"]:
-            if random.random() < self.conf["prob_wake"]:
-                wake = True
-                reason = "概率唤醒"
-
-        # 违禁词检查
-        if self.conf["wake_forbidden_words"]:
-            for word in self.conf["wake_forbidden_words"]:
-                if not event.is_admin() and word in event.message_str:
-                    logger.debug(f"用户({uid})消息含违禁词：{word}")
-                    event.stop_event()
-                    return
+        wake: bool = event.is_at_or_wake_command  # 是否唤醒
+        reason: str = "at_or_cmd"                 # 唤醒原因
+
+        # 已被@或唤醒词唤醒时无需再做任何判断
+        if not wake:
+            member: MemberState = g.get_member(uid)
+            wake, reason = await self._decide_wake(
+                event, msg, member, time.monotonic(), mention
+            )
 
         # --- 标记唤醒状态 ---
         
@@ -218,6 +353,78 @@ class WakeProPlugin(Star):
             logger.info(f"群({gid})用户({uid}) {reason}：{msg[:50]}")
             # 注意: 所有检测和防护都在第二层(on_llm_request)处理
 
+    async def _decide_wake(
+        self,
+        event: AstrMessageEvent,
+        msg: str,
+        member: MemberState,
+        now: float,
+        mention: str | None = None
+    ) -> tuple[bool, str]:
+        """
+        唤醒条件判断(按开销从低到高排列)
+
+        Args:
+            mention: 消息中命中的提及昵称(由 ConfSnapshot.scan_keywords 得到)
+
+        Returns:
+            (是否唤醒, 唤醒原因)
+        """
+        cfg: ConfSnapshot = self._cfg
+
+        # 1. 提及唤醒：消息中包含特定关键词
+        if mention:
+            return True, f"提及唤醒({mention})"
+
+        # 2. 唤醒延长：在上次LLM响应后的延长窗口内
+        if cfg.wake_extend and (now - member.last_response) <= cfg.wake_extend:
+            return True, "唤醒延长"
+
+        # 3. 概率唤醒：随机唤醒
+        if cfg.prob_wake and random.random() < cfg.prob_wake:
+            return True, "概率唤醒"
+
+        # 过短的消息(如"嗯"、"哦")或不含文字的消息(纯表情、标点)无法有效判断
+        # 语义与话题，跳过以下检测
+        if len(msg) < cfg.min_wake_len or not any(c.isalnum() for c in msg):
+            return False, ""
+
+        # 话题相关性唤醒需要读取历史记录，提前发起，与下面的语义检测并行执行
+        history_task: asyncio.Task[list[str] | None] | None = None
+        if cfg.relevant_wake:
+            history_task = asyncio.create_task(self._get_history_msg(event, count=5))
+
+        try:
+            # 语义检测: 一次分词同时计算答疑/无聊得分(在线程中执行，不阻塞事件循环)
+            if cfg.ask_wake or cfg.bored_wake:
+                scores: Mapping[str, float] = await asyncio.to_thread(
+                    self.sent.score_all, msg, ("ask", "bored")
+                )
+
+                # 4. 答疑唤醒：检测到提问意图
+                if cfg.ask_wake and scores["ask"] > cfg.ask_wake:
+                    return True, "答疑唤醒"
+
+                # 5. 无聊唤醒：检测到无聊/寻求陪伴的意图
+                if cfg.bored_wake and scores["bored"] > cfg.bored_wake:
+                    return True, "无聊唤醒"
+
+            # 6. 话题相关性唤醒：与最近对话内容相关(需读取历史记录，放在最后)
+            if history_task and (bmsgs := await history_task):
+                # 分词与相似度计算在线程中执行，不阻塞事件循环
+                simi: float = max(await asyncio.to_thread(
+                    Similarity.cosine_batch, msg, bmsgs, event.get_group_id()
+                ))
+                if simi > cfg.relevant_wake:
+                    return True, f"话题相关性{simi:.2f}>{cfg.relevant_wake}"
+
+            return False, ""
+
+        finally:
+            # 已由其他条件唤醒(或出错)时取消尚未完成的历史记录读取
+            if history_task and not history_task.done():
+                history_task.cancel()
+
     # ==================== 消息合并处理 ====================
     
     async def _handle_message_merge(
@@ -227,13 +434,14 @@ class WakeProPlugin(Star):
         uid: str,
         member: MemberState,
         now: float
-    ):
+    ) -> None:
         """消息合并处理"""
-        message_buffer = [event.message_str]
+        cfg: ConfSnapshot = self._cfg
+        message_buffer: list[str] = [event.message_str]
         first_event = event
         
-        @session_waiter(timeout=self.conf["merge_delay"], record_history_chains=False)
-        async def collect_messages(controller: SessionController, ev: AstrMessageEvent):
+        @session_waiter(timeout=cfg.merge_delay, record_history_chains=False)
+        async def collect_messages(controller: SessionController, ev: AstrMessageEvent) -> None:
             """收集后续消息"""
             nonlocal message_buffer
             
@@ -250,7 +458,7 @@ class WakeProPlugin(Star):
             # 防止重复处理第一条消息
             if len(message_buffer) == 1 and ev.message_str == message_buffer[0]:
                 logger.debug(f"合并：跳过重复的第一条消息")
-                controller.keep(timeout=self.conf["merge_delay"], reset_timeout=True)
+                controller.keep(timeout=cfg.merge_delay, reset_timeout=True)
                 return
             
             # 消息数量限制（防止轰炸攻击）
@@ -262,9 +470,9 @@ class WakeProPlugin(Star):
                 controller.stop()
                 return
             
-            request_cd = self.conf.get("request_cd", 0)
+            request_cd = cfg.request_cd
             if request_cd > 0:
-                time_since_last_request = time.time() - member.last_request
+                time_since_last_request = time.monotonic() - member.last_request
                 if time_since_last_request < request_cd:
                     logger.debug(
                         f"合并：消息间隔过短，请求CD阻止"
@@ -281,7 +489,7 @@ class WakeProPlugin(Star):
             ev.stop_event()
             
             # 重置超时，继续等待
-            controller.keep(timeout=self.conf["merge_delay"], reset_timeout=True)
+            controller.keep(timeout=cfg.merge_delay, reset_timeout=True)
         
         try:
             await collect_messages(event)
@@ -300,7 +508,7 @@ class WakeProPlugin(Star):
     # ==================== 第二层: LLM请求级别钩子 ====================
     
     @filter.on_llm_request(priority=99)
-    async def on_llm_request(self, event: AstrMessageEvent, req: ProviderRequest):
+    async def on_llm_request(self, event: AstrMessageEvent, req: ProviderRequest) -> None:
         """
         【第二层: LLM请求级别 - 深度防护】
         
@@ -315,13 +523,11 @@ class WakeProPlugin(Star):
         if not gid or not uid:
             return
         
-        g: GroupState = StateManager.get_group(gid)
-        if uid not in g.members:
-            g.members[uid] = MemberState(uid=uid)
-        
-        member = g.members[uid]
-        now = time.time()
-        msg = event.message_str
+        g: GroupState = self.state.get_group(gid)
+        member: MemberState = g.get_member(uid)
+        now: float = time.monotonic()
+        msg: str = event.message_str
+        cfg: ConfSnapshot = self._cfg
         
         # 如果用户正在消息合并状态，跳过检查(由 session_waiter 处理)
         if member.in_merging:
@@ -330,30 +536,37 @@ class WakeProPlugin(Star):
 
         # ========== 1. 沉默触发检测 ==========
         
+        # 一次分词同时计算闭嘴/辱骂/人机得分(在线程中执行，不阻塞事件循环)
+        scores: Mapping[str, float] = {}
+        if cfg.shutup or cfg.insult or cfg.ai:
+            scores = await asyncio.to_thread(
+                self.sent.score_all, msg, ("shut", "insult", "ai")
+            )
+
         # 闭嘴机制: 针对整个群组(立即生效)
-        if self.conf["shutup"]:
-            shut_th = self.sent.shut(msg)
-            if shut_th > self.conf["shutup"]:
-                silence_sec = shut_th * self.conf["silence_multiple"]
+        if cfg.shutup:
+            shut_th = scores["shut"]
+            if shut_th > cfg.shutup:
+                silence_sec = shut_th * cfg.silence_multiple
                 g.shutup_until = now + silence_sec
                 logger.info(f"群({gid})触发闭嘴，沉默{silence_sec:.1f}秒")
                 event.stop_event()
                 return
 
         # 辱骂沉默机制: 针对单个用户(下次生效,本次允许bot回怼)
-        if self.conf["insult"]:
-            insult_th = self.sent.insult(msg)
-            if insult_th > self.conf["insult"]:
-                silence_sec = insult_th * self.conf["silence_multiple"]
+        if cfg.insult:
+            insult_th = scores["insult"]
+            if insult_th > cfg.insult:
+                silence_sec = insult_th * cfg.silence_multiple
                 member.silence_until = now + silence_sec
                 logger.info(f"用户({uid})触发辱骂沉默{silence_sec:.1f}秒(下次生效)")
                 # 不阻止本次对话，让bot回怼
 
         # AI检测沉默机制: 针对单个用户(立即生效)
-        if self.conf["ai"]:
-            ai_th = self.sent.is_ai(msg)
-            if ai_th > self.conf["ai"]:
-                silence_sec = ai_th * self.conf["silence_multiple"]
+        if cfg.ai:
+            ai_th = scores["ai"]
+            if ai_th > cfg.ai:
+                silence_sec = ai_th * cfg.silence_multiple
                 member.silence_until = now + silence_sec
                 logger.info(f"用户({uid})触发AI检测沉默{silence_sec:.1f}秒")
                 event.stop_event()
@@ -374,7 +587,7 @@ class WakeProPlugin(Star):
             return
 
         # 请求CD检查: 防止消息轰炸
-        request_cd_value = self.conf.get("request_cd", 0)
+        request_cd_value = cfg.request_cd
         if request_cd_value > 0:
             time_since_last_request = now - member.last_request
             if time_since_last_request < request_cd_value:
@@ -391,7 +604,7 @@ class WakeProPlugin(Star):
         # ========== 3. 消息合并处理 ==========
         
         # 消息合并: 等待短时间内的后续消息
-        if self.conf["merge_delay"] and self.conf["merge_delay"] > 0:
+        if cfg.merge_delay > 0:
             if not member.in_merging:
                 member.in_merging = True
                 try:
@@ -404,7 +617,7 @@ class WakeProPlugin(Star):
     # ==================== 事件钩子 ====================
     
     @filter.on_llm_response(priority=20)
-    async def on_llm_response(self, event: AstrMessageEvent, resp: LLMResponse):
+    async def on_llm_response(self, event: AstrMessageEvent, resp: LLMResponse) -> None:
         """LLM响应后的钩子"""
         gid: str = event.get_group_id()
         uid: str = event.get_sender_id()
@@ -412,23 +625,23 @@ class WakeProPlugin(Star):
         if not gid or not uid:
             return
             
-        g: GroupState = StateManager.get_group(gid)
+        g: GroupState = self.state.get_group(gid)
         member = g.members.get(uid)
         
         if not member:
             return
         
-        member.last_response = time.time()
+        member.last_response = time.monotonic()
         logger.debug(f"LLM响应完成，更新用户({uid})的last_response时间")
 
     # ==================== 辅助方法 ====================
-    
+
     async def _get_history_msg(
         self,
         event: AstrMessageEvent,
         role: str = "assistant",
         count: int | None = 0
-    ) -> list | None:
+    ) -> list[str] | None:
         """获取历史消息"""
         try:
             umo = event.unified_msg_origin
@@ -442,12 +655,24 @@ class WakeProPlugin(Star):
             if not conversation:
                 return None
 
-            history = json.loads(conversation.history or "[]")
-            contexts = [
-                record["content"]
-                for record in history
-                if record.get("role") == role and record.get("content")
-            ]
+            # 同一会话历史未变化时直接复用上次的解析结果
+            history_str = conversation.history or "[]"
+            key = (curr_cid, role)
+            sig = (len(history_str), hash(history_str))
+            cached = self._history_cache.get(key)
+            if cached and cached[0] == sig:
+                self._history_cache.move_to_end(key)
+                contexts = cached[1]
+            else:
+                history = orjson.loads(history_str)
+                contexts = [
+                    record["content"]
+                    for record in history
+                    if record.get("role") == role and record.get("content")
+                ]
+                self._history_cache[key] = (sig, contexts)
+                if len(self._history_cache) > HISTORY_CACHE_SIZE:
+                    self._history_cache.popitem(last=False)
             
             return contexts[-count:] if count else contexts
 
@@ -465,7 +690,7 @@ class WakeProPlugin(Star):
             umo = event.unified_msg_origin
             curr_cid = await self.context.conversation_manager.get_curr_conversation_id(umo)
             conversation = await self.context.conversation_manager.get_conversation(umo, curr_cid)
-            contexts = json.loads(conversation.history)
+            contexts = orjson.loads(conversation.history)
 
             personality = self.context.get_using_provider().curr_personality
             personality_prompt = personality["prompt"] if personality else ""
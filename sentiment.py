@@ -1,11 +1,18 @@
 import math
 import jieba
 import re
+from collections.abc import Mapping
+from functools import lru_cache
+from types import MappingProxyType
 from astrbot.api import logger
+from .similarity import _lcut
 
 # 扩充jieba词典, 后续补充
 jieba.add_word("傻逼")
 
+# 预编译的正则: 去除标点符号
+_PUNCT_RE = re.compile(r"[^\w\s\u4e00-\u9fa5]")
+
 class Sentiment:
     """
     高精度语义检测器 - 优化版词表
@@ -208,39 +215,58 @@ class Sentiment:
     # 反问词表 - 可能改变语义
     RHETORICAL_WORDS = {"难道", "何必", "怎么可以", "怎么可能", "哪能", "岂能", "谁还"}
 
+    # score_all 的检测项与对应词表
+    _KIND_WORDS = {
+        "shut": SHUT_WORDS,
+        "insult": INSULT_WORDS,
+        "bored": BORED_WORDS,
+        "ask": ASK_WORDS,
+        "ai": AI_WORDS,
+    }
+
     @classmethod
-    def _seg(cls, text: str) -> list:
-        """分词并保留位置信息"""
-        text = re.sub(r"[^\w\s\u4e00-\u9fa5]", "", text.lower())
+    @lru_cache(maxsize=2048)
+    def _seg(cls, text: str) -> tuple[str, ...]:
+        """分词并保留位置信息(结果按文本缓存)"""
+        text = _PUNCT_RE.sub("", text.lower())
         words = []
-        for word in jieba.lcut(text):
+        for word in _lcut(text):
             if word.strip() and word not in cls.STOP:
                 words.append(word)
         logger.debug(f"[wakepro] {words}")
-        return words
+        return tuple(words)
 
     @classmethod
-    def _calculate_confidence(cls, words: list, keyword_dict: dict) -> float:
-        """计算语义可信度"""
+    def _features(cls, words: tuple[str, ...]) -> tuple[bool, frozenset[int]]:
+        """提取各检测项共用的上下文特征: (是否含反问表达, 前3个词内有否定词的位置)"""
+        has_rhetorical = not cls.RHETORICAL_WORDS.isdisjoint(words)
+        negated: set[int] = set()
+        for j, word in enumerate(words):
+            if word in cls.NEGATION_WORDS:
+                negated.update(range(j + 1, j + 4))
+        return has_rhetorical, frozenset(negated)
+
+    @classmethod
+    def _calculate_confidence(
+        cls,
+        words: tuple[str, ...],
+        keyword_dict: dict,
+        features: tuple[bool, frozenset[int]] | None = None,
+    ) -> float:
+        """计算语义可信度(features 可由调用方预先算好，多项检测共用)"""
         # 1. 基础匹配分数
-        base_score = 0
+        base_score = 0.0
         matched_keywords = []
 
-        # 检查反问表达
-        has_rhetorical = any(r_word in words for r_word in cls.RHETORICAL_WORDS)
+        # 检查反问表达 / 否定词
+        has_rhetorical, negated = features or cls._features(words)
 
         for i, word in enumerate(words):
             if word in keyword_dict:
                 weight, intensity = keyword_dict[word]
 
-                # 检查否定词
-                has_negation = any(
-                    neg_word in words[max(0, i - 3) : i]
-                    for neg_word in cls.NEGATION_WORDS
-                )
-
                 # 否定词降低权重
-                if has_negation:
+                if i in negated:
                     weight *= 0.3
                     intensity *= 0.5
                 # 反问句可能反转语义
@@ -252,7 +278,7 @@ class Sentiment:
                 matched_keywords.append(word)
 
         # 2. 上下文增强分数
-        context_score = 0
+        context_score = 0.0
         if matched_keywords:
             # 关键词密度增强
             density = len(matched_keywords) / len(words) if words else 0
@@ -272,6 +298,23 @@ class Sentiment:
         return min(0.99, confidence)
 
     # 对外接口
+    @classmethod
+    @lru_cache(maxsize=4096)
+    def score_all(
+        cls, text: str, kinds: tuple[str, ...] = ()
+    ) -> Mapping[str, float]:
+        """
+        一次分词计算多项得分, kinds 为空时计算全部(结果按文本缓存，只读)
+
+        可选项: shut, insult, bored, ask, ai
+        """
+        words = cls._seg(text)
+        features = cls._features(words)
+        return MappingProxyType({
+            kind: cls._calculate_confidence(words, cls._KIND_WORDS[kind], features)
+            for kind in kinds or cls._KIND_WORDS
+        })
+
     @classmethod
     def shut(cls, text: str) -> float:
         """判断是否要闭嘴"""
@@ -1,7 +1,31 @@
 import math
 import jieba
-from collections import defaultdict, deque
+from collections import Counter, deque
+from collections.abc import Iterable
+from functools import lru_cache
 import re
+import threading
+
+# 预编译的正则: 去除标点符号 / 判断是否为纯中文词
+_PUNCT_RE = re.compile(r"[^\w\s\u4e00-\u9fa5]")
+_HAN_RE = re.compile(r"^[\u4e00-\u9fa5]+$")
+
+
+def _lcut(text: str) -> list[str]:
+    """分词: 纯 ASCII 文本(英文、数字)按空白切分，结果与 jieba 一致，且无需走 jieba 的 DAG/HMM"""
+    return text.split() if text.isascii() and "_" not in text else jieba.lcut(text)
+
+
+class _GroupStat:
+    """单个群的话题状态"""
+
+    __slots__ = ("cache", "weights", "lock", "updates")
+
+    def __init__(self, cache_size: int = 20):
+        self.cache: deque[str] = deque(maxlen=cache_size)  # 最近的话题词
+        self.weights: dict[str, float] = {}                # 话题词 -> 权重
+        self.lock = threading.Lock()                       # 计算可能在线程池中并发执行
+        self.updates = 0                                   # 话题缓存更新次数
 
 
 class Similarity:
@@ -26,23 +50,23 @@ class Similarity:
     }
 
     # 每个群维护自己的状态
-    _GROUP_DATA = defaultdict(
-        lambda: {
-            "cache": deque(maxlen=20),
-            "weights": defaultdict(float),
-        }
-    )
+    _GROUP_DATA: dict[str, _GroupStat] = {}
     DECAY_FACTOR = 0.95  # 权重衰减因子（全局统一）
+    PRUNE_INTERVAL = 100  # 每更新多少次清理一次已移出话题缓存的词的权重
 
 
     # 内部工具
     @classmethod
-    def _state(cls, group_id: str):
+    def _state(cls, group_id: str) -> _GroupStat:
         """根据群号拿到该群的独立数据"""
-        return cls._GROUP_DATA[group_id]
+        st = cls._GROUP_DATA.get(group_id)
+        if st is None:
+            # setdefault 是原子操作，多个线程同时创建时只会保留一份
+            st = cls._GROUP_DATA.setdefault(group_id, _GroupStat())
+        return st
 
     @classmethod
-    def _update_topic_cache(cls, words, group_id: str):
+    def _update_topic_cache(cls, words: Iterable[str], group_id: str) -> None:
         """更新指定群的话题缓存和权重"""
         st = cls._state(group_id)
 
@@ -51,29 +75,33 @@ class Similarity:
             if (
                 word not in cls.STOP
                 and len(word) > 1
-                and re.match(r"^[\u4e00-\u9fa5]+$", word)
+                and _HAN_RE.match(word)
             ):
-                st["cache"].append(word) # type: ignore
+                st.cache.append(word)
 
         # 计算频率
-        freq = defaultdict(int)
-        for w in st["cache"]:
-            freq[w] += 1
+        freq = Counter(st.cache)
 
         # 更新权重
         for w, cnt in freq.items():
-            decayed = st["weights"].get(w, 0) * cls.DECAY_FACTOR  # type: ignore
+            decayed = st.weights.get(w, 0) * cls.DECAY_FACTOR
             current = cnt * (1.0 + math.log(len(w) or 1))
-            st["weights"][w] = max(decayed, current)
+            st.weights[w] = max(decayed, current)
+
+        # 定期清理: 已移出话题缓存的词不再参与衰减，其权重会一直残留
+        st.updates += 1
+        if st.updates % cls.PRUNE_INTERVAL == 0:
+            st.weights = {w: v for w, v in st.weights.items() if w in freq}
 
     @classmethod
-    def _extract_keywords(cls, s: str, group_id: str) -> list:
-        """提取关键词并更新指定群的话题缓存"""
-        s = re.sub(r"[^\w\s\u4e00-\u9fa5]", "", s)
-        words = [w for w in jieba.lcut(s) if w.strip() and w not in cls.STOP]
+    @lru_cache(maxsize=8192)
+    def _segment(cls, s: str) -> tuple[str, ...]:
+        """分词并合并连续数字/单字（与群无关，结果按文本缓存）"""
+        s = _PUNCT_RE.sub("", s)
+        words = [w for w in _lcut(s) if w.strip() and w not in cls.STOP]
 
         # 合并连续数字/单字
-        merged = []
+        merged: list[str] = []
         for w in words:
             if merged and (
                 (w.isdigit() and merged[-1][-1].isdigit())
@@ -83,65 +111,101 @@ class Similarity:
             else:
                 merged.append(w)
 
-        cls._update_topic_cache(merged, group_id)
-        return merged
+        return tuple(merged)
+
+    @classmethod
+    def _extract_keywords(cls, s: str, group_id: str) -> tuple[str, ...]:
+        """提取关键词并更新指定群的话题缓存"""
+        words = cls._segment(s)
+        cls._update_topic_cache(words, group_id)
+        return words
+
 
+    @classmethod
+    @lru_cache(maxsize=8192)
+    def _term_counts(
+        cls, s: str
+    ) -> tuple[tuple[tuple[str, int], ...], tuple[tuple[str, int], ...]]:
+        """统计一元词/二元词的出现次数（与群无关，结果按文本缓存）"""
+        words = cls._segment(s)
+        unigrams = Counter(words)
+        bigrams = Counter(words[i] + words[i + 1] for i in range(len(words) - 1))
+        return tuple(unigrams.items()), tuple(bigrams.items())
 
     # 公共 API
     @classmethod
     def _tokens(cls, s: str, group_id: str) -> dict[str, float]:
         """生成带权重的词向量（群内）"""
-        words = cls._extract_keywords(s, group_id)
-        st = cls._state(group_id)
-        tf = defaultdict(float)
+        cls._extract_keywords(s, group_id)
+        unigrams, bigrams = cls._term_counts(s)
+        weights_get = cls._state(group_id).weights.get
 
-        # 一元词
-        for w in words:
-            weight = 1.0 + st["weights"].get(w, 0)  # type: ignore
-            tf[w] += weight
+        # 一元词: 词频缓存，权重按群内当前话题实时计算（Counter 已去重，可直接赋值）
+        tf: dict[str, float] = {w: c * (1.0 + weights_get(w, 0)) for w, c in unigrams}
 
-        # 二元词
-        for i in range(len(words) - 1):
-            bigram = words[i] + words[i + 1]
-            tf[bigram] += 1.5
+        # 二元词: 拼接后可能与一元词重名，需累加
+        tf_get = tf.get
+        for bigram, c in bigrams:
+            tf[bigram] = tf_get(bigram, 0) + 1.5 * c
 
-        total = max(sum(tf.values()), 1)
-        return {w: c / total for w, c in tf.items()}
+        # 预先做 L2 归一化，余弦计算时无需再求模长
+        norm = math.sqrt(sum(c * c for c in tf.values())) or 1
+        return {w: c / norm for w, c in tf.items()}
+
+    @classmethod
+    def _cosine(cls, v1: dict[str, float], v2: dict[str, float], group_id: str) -> float:
+        """计算两个已归一化词向量的相似度"""
+        # 只有两边都出现的词才对点积有贡献，遍历较小的向量即可
+        if len(v1) > len(v2):
+            v1, v2 = v2, v1
+
+        # 循环内只做局部变量查找，避免每个词都重复查群状态与属性
+        weights_get = cls._state(group_id).weights.get
+        v2_get = v2.get
+        dot = 0.0
+        for w, x in v1.items():
+            if (y := v2_get(w, 0)) > 0:
+                dot += x * y * (2.0 + weights_get(w, 0))
+
+        return 1 / (1 + math.exp(-8 * (dot - 0.6)))
 
     @classmethod
     def cosine(cls, a: str, b: str, group_id: str = "default") -> float:
         """计算同一群内两条文本的相似度"""
-        v1 = cls._tokens(a, group_id)
-        v2 = cls._tokens(b, group_id)
-        all_w = set(v1) | set(v2)
-
-        dot = 0
-        for w in all_w:
-            x, y = v1.get(w, 0), v2.get(w, 0)
-            if x > 0 and y > 0:
-                dot += x * y * (2.0 + cls._state(group_id)["weights"].get(w, 0))  # type: ignore
-            else:
-                dot += x * y
+        return cls.cosine_batch(a, [b], group_id)[0]
+
+    @classmethod
+    def cosine_batch(
+        cls, a: str, bs: Iterable[str], group_id: str = "default"
+    ) -> list[float]:
+        """
+        计算同一群内一条文本与多条文本的相似度（a 的词向量只计算一次）
+
+        bs 只会被遍历一次，可直接传入 deque 等任意可迭代对象，无需先转为列表
 
-        norm1 = math.sqrt(sum(v * v for v in v1.values()))
-        norm2 = math.sqrt(sum(v * v for v in v2.values()))
-        raw = dot / (norm1 * norm2 + 1e-8)
-        return 1 / (1 + math.exp(-8 * (raw - 0.6)))
+        线程安全: 同一群的计算持有该群的锁，不同群之间可并行
+        """
+        with cls._state(group_id).lock:
+            v1 = cls._tokens(a, group_id)
+            return [cls._cosine(v1, cls._tokens(b, group_id), group_id) for b in bs]
 
     @classmethod
-    def get_current_topics(cls, group_id: str = "default", top_n: int = 5):
+    def get_current_topics(
+        cls, group_id: str = "default", top_n: int = 5
+    ) -> list[tuple[str, float]]:
         """获取指定群当前最重要的 top_n 个话题"""
         st = cls._state(group_id)
-        return sorted(st["weights"].items(), key=lambda kv: kv[1], reverse=True)[:top_n]  # type: ignore
+        with st.lock:
+            return sorted(st.weights.items(), key=lambda kv: kv[1], reverse=True)[:top_n]
 
 
     # 管理工具（可选）
     @classmethod
-    def clear_group(cls, group_id: str):
+    def clear_group(cls, group_id: str) -> None:
         """清空某个群的所有话题数据"""
         cls._GROUP_DATA.pop(group_id, None)
 
     @classmethod
-    def list_groups(cls):
+    def list_groups(cls) -> list[str]:
         """返回当前有数据的群号列表"""
         return list(cls._GROUP_DATA.keys())